@@ -8,10 +8,40 @@ ChatModerationAgent that returns:
 - Redacts PII before calling LLM and instructs LLM not to output PII.
 """
 
+import asyncio
+import functools
+import os
 import re
-from typing import Dict, Any, Optional, List, Callable
+import threading
+from typing import Dict, Any, Optional, List, Callable, Awaitable, AsyncIterator
 from pydantic import BaseModel
 
+from utils.concurrency import gather_bounded
+
+try:
+    import ahocorasick  # optional: pip install pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import re2  # optional: pip install google-re2 (linear-time, no backtracking)
+except ImportError:
+    re2 = None
+
+try:
+    import hyperscan  # optional: pip install hyperscan (single-pass multi-pattern scan)
+except ImportError:
+    hyperscan = None
+
+def _load_native_detector(*patterns: Any) -> Optional[Any]:
+    """moderation_rs.Detector over the given patterns, or None when it can't be loaded or built."""
+    try:
+        import moderation_rs  # optional native detector: pip install ./moderation-rs
+        return moderation_rs.Detector(*patterns)
+    except Exception as e:
+        print("⚠️ Native moderation detector unavailable, using the Python detectors:", e)
+        return None
+
 # detection input model (used by FastAPI)
 class ModerateInput(BaseModel):
     message: str
@@ -19,6 +49,109 @@ class ModerateInput(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+# JSON-ish fields pulled out of LLM replies
+_REASON_RE = re.compile(r'"reason"\s*:\s*"([^"]{1,400}?)"')
+_DESC_RE = re.compile(r'"description"\s*:\s*"([^"]{1,2000}?)"')
+_SENT_SPLIT_RE = re.compile(r"[.!?]\s+")
+
+# one {"i": .., "reason": .., "description": ..} entry of a batched LLM reply
+_BATCH_ITEM_RE = re.compile(
+    r'\{\s*"i"\s*:\s*(\d+)\s*,\s*"reason"\s*:\s*"([^"]{1,400}?)"\s*,\s*"description"\s*:\s*"([^"]{1,2000}?)"\s*\}'
+)
+
+# detector ids used by the Hyperscan prefilter
+PHONE_ID, URL_ID, PROFANITY_ID, PAYMENT_ID, REPEATED_ID = range(5)
+
+
+# RE2's \s, \S and \b are ASCII-only and its \s leaves out \x0b, so it only agrees
+# with the stdlib engine on ASCII text without \x0b or the 0x1C-0x1F separators
+_RE2_UNSAFE = re.compile(r"[^\x00-\x0a\x0c-\x1b\x20-\x7f]")
+
+
+def _compile_linear(pattern: str):
+    """Compile with RE2 (guaranteed linear time); None when google-re2 is unavailable."""
+    if re2 is None:
+        return None
+    try:
+        return re2.compile(pattern)
+    except Exception:
+        return None
+
+
+def _keyword_matcher(keywords: List[str]) -> Callable[[str], List[str]]:
+    """
+    Build a one-pass substring matcher for `keywords` (hits returned in keyword order).
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, else a regex alternation.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for k in keywords:
+            automaton.add_word(k, k)
+        automaton.make_automaton()
+
+        def _find(text: str) -> List[str]:
+            found = {k for _, k in automaton.iter(text)}
+            return [k for k in keywords if k in found]
+
+        return _find
+
+    # regex fallback: only the longest keyword matches at a position, so also
+    # credit the keywords it contains (e.g. "send rs" inside "send rs.")
+    longest_first = sorted(keywords, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, longest_first)) + "))")
+    contained = {k: {j for j in keywords if j in k} for k in keywords}
+
+    def _find(text: str) -> List[str]:
+        found = set()
+        for m in pattern.finditer(text):
+            found |= contained[m.group(1)]
+        return [k for k in keywords if k in found]
+
+    return _find
+
+
+def _build_prefilter(expressions: Dict[int, str]) -> Optional[Callable[[str], Optional[set]]]:
+    """
+    Compile one Hyperscan database from {detector_id: expression}.
+    The returned callable scans an ASCII message once and returns the ids that fired;
+    for non-ASCII text it returns None (unknown). None when hyperscan is unavailable.
+    """
+    if hyperscan is None:
+        return None
+
+    ids = list(expressions)
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[expressions[i].encode("utf-8") for i in ids],
+            ids=ids,
+            elements=len(ids),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(ids),
+        )
+    except Exception:
+        return None
+
+    # scratch space can't be shared by concurrent scans: one per thread
+    local = threading.local()
+
+    def _scan(text: str) -> Optional[set]:
+        # Hyperscan classes are ASCII; Python's \d, \s and case folding are Unicode
+        if not text.isascii():
+            return None
+        hits = set()
+
+        def _on_match(id_, start, end, match_flags, context):
+            hits.add(id_)
+
+        scratch = getattr(local, "scratch", None)
+        if scratch is None:
+            scratch = local.scratch = hyperscan.Scratch(db)
+        db.scan(text.encode("ascii"), match_event_handler=_on_match, scratch=scratch)
+        return hits
+
+    return _scan
+
+
 class ChatModerationAgent:
     PHONE_PATTERNS = [
         re.compile(r"\b\d{10}\b"),
@@ -27,19 +160,59 @@ class ChatModerationAgent:
         re.compile(r"\b\d{5}[-\s]?\d{5}\b"),
         re.compile(r"\b\+?[0-9]{7,15}\b"),
     ]
+    # all phone patterns as one alternation -> a single scan per message
+    PHONE_COMBINED = re.compile("|".join(f"(?:{p.pattern})" for p in PHONE_PATTERNS))
 
     PROFANITY = {
         "idiot", "stupid", "bastard", "fuck",
         "motherfucker", "damn", "asshole", "chutiya", "gandu"
     }
-
-    URL_PATTERN = re.compile(r"https?://\S+|www\.\S+|\b[a-z0-9.-]+\.(com|in|net|org|co|io|me)\b", flags=re.IGNORECASE)
-    REPEATED_CHAR_PATTERN = re.compile(r"(.)\1{7,}", flags=re.DOTALL)
+    # longest words first so the alternation is deterministic
+    PROFANITY_RE = re.compile(
+        r"\b(" + "|".join(map(re.escape, sorted(PROFANITY, key=len, reverse=True))) + r")\b"
+    )
+
+    URL_PATTERN = re.compile(r"(?i)https?://\S+|www\.\S+|\b[a-z0-9.-]+\.(?:com|in|net|org|co|io|me)\b")
+    # User-controlled input: on a long dotted run the stdlib engine retries the domain
+    # branch from every word start, which is quadratic. Once it has failed at one start
+    # it fails at every later start of the same run, so the "skip" branch consumes the
+    # run (stopping where an http/www URL begins) and the scan stays linear. Same
+    # matches as URL_PATTERN; skip matches are dropped by _find_urls / _redact_urls.
+    _URL_SCAN = re.compile(
+        URL_PATTERN.pattern + r"|(?P<skip>\b(?:(?!https?://\S|www\.\S)[a-z0-9.-])+)"
+    )
+    # RE2 is faster still, wherever it gives the same matches
+    _URL_PATTERN_LINEAR = _compile_linear(URL_PATTERN.pattern)
+    # only used with search(): 8 equal chars are enough, no need to consume the whole run
+    REPEATED_CHAR_PATTERN = re.compile(r"(.)\1{7}", flags=re.DOTALL)
 
     PAYMENT_KEYWORDS = [
         "upi", "paytm", "phonepe", "gpay", "bank account", "ifsc",
         "transfer money", "send ₹", "send rs", "send rs.", "payment", "pay now"
     ]
+    # built once at class load; one pass over the message for all keywords
+    _match_payment = staticmethod(_keyword_matcher(PAYMENT_KEYWORDS))
+
+    # One linear scan telling which detectors can fire at all, so the clean
+    # majority of messages skips the per-detector passes. Each expression is a
+    # looser superset of its detector: no hit means the detector cannot match.
+    _prefilter = staticmethod(_build_prefilter({
+        PHONE_ID: r"[0-9]{5}",  # every phone pattern needs 5+ consecutive digits
+        URL_ID: r"https?://|www\.|\.(?:com|in|net|org|co|io|me)",
+        PROFANITY_ID: "|".join(map(re.escape, PROFANITY)),
+        PAYMENT_ID: "|".join(map(re.escape, PAYMENT_KEYWORDS)),
+        # no backreferences in Hyperscan: spell out "same char 8 times" per ASCII char
+        REPEATED_ID: "|".join(f"\\x{c:02x}{{8}}" for c in range(128)),
+    }))
+
+    # Native (Rust) detector running the same patterns in one call. Opt-in with
+    # MODERATION_NATIVE=1 once the build has passed the parity test; it then takes
+    # over from the prefilter + Python passes for the text it can handle. Only
+    # imported and built on first use, and only when opted in.
+    USE_NATIVE = os.getenv("MODERATION_NATIVE", "0") == "1"
+    _native: Optional[Any] = None
+    _native_built = False
+    _native_lock = threading.Lock()
 
     STATUS_MAP = {
         "abusive": ("Abusive", "Contains insulting language"),
@@ -49,41 +222,166 @@ class ChatModerationAgent:
         "safe": ("Safe", "No issues detected"),
     }
 
-    def __init__(self, llm_client: Optional[Callable[[str], str]] = None):
+    BATCH_SIZE = 10  # messages per LLM prompt in moderate_many
+    BATCH_TOKENS_PER_ITEM = 160  # reply budget per message: reason + 2-3 sentence description + JSON
+    MAX_CONCURRENCY = 4  # LLM calls in flight per batch
+    DETECTION_CACHE_SIZE = 4096  # distinct messages kept by the detection cache
+    OFFLOAD_SCAN_CHARS = 1000  # longer messages are scanned in a worker thread, off the event loop
+    MAX_SCAN_CHARS = 5000  # longer messages are scanned on their first N chars and flagged "truncated"
+
+    def __init__(self, llm_client: Optional[Callable[[str], Awaitable[str]]] = None):
         """
-        llm_client: callable(prompt: str) -> str (or None)
+        llm_client: async callable(prompt: str) -> str (or None);
+                    moderate_stream() also calls it with stream=True for an async iterator of text
         """
         self.llm = llm_client
+        # chat text repeats a lot; keyed on the scanned prefix, so entries stay bounded
+        self._detect = functools.lru_cache(maxsize=self.DETECTION_CACHE_SIZE)(self._detect)
+
+    # ------ URL matching: RE2 where it matches like `re`, else the linear stdlib scan ------
+    def _use_re2(self, text: str) -> bool:
+        return self._URL_PATTERN_LINEAR is not None and not _RE2_UNSAFE.search(text)
+
+    def _find_urls(self, text: str) -> List[str]:
+        if self._use_re2(text):
+            return [u for u in self._URL_PATTERN_LINEAR.findall(text) if u]
+        return [m.group() for m in self._URL_SCAN.finditer(text) if m.lastgroup != "skip"]
+
+    def _redact_urls(self, text: str) -> str:
+        if self._use_re2(text):
+            return self._URL_PATTERN_LINEAR.sub("[URL]", text)
+        return self._URL_SCAN.sub(lambda m: m.group() if m.lastgroup == "skip" else "[URL]", text)
+
+    # ------ raw detections, pure Python ------
+    def _scan(self, msg: str, lower: str) -> Dict[str, Any]:
+        # which detectors can fire at all (None = unknown, run them all)
+        hits = self._prefilter(msg) if self._prefilter else None
+
+        def _may_match(detector_id: int) -> bool:
+            return hits is None or detector_id in hits
+
+        # profanity first: it decides the final status on its own
+        profane_matches: List[str] = []
+        if _may_match(PROFANITY_ID):
+            profane_matches = list(dict.fromkeys(self.PROFANITY_RE.findall(lower)))
+
+        # phones are still collected on abusive messages; the UI shows them in matches
+        phones_found: List[str] = []
+
+        def _collect_phone(m):
+            phones_found.append(re.sub(r"[^\d\+]", "", m.group(0)))
+            return "[PHONE]"
+
+        # one pass both collects the phones and redacts them for the LLM prompt
+        redacted = self.PHONE_COMBINED.sub(_collect_phone, msg) if _may_match(PHONE_ID) else msg
+        if phones_found:
+            redacted = self._redact_phones(redacted)
+
+        if profane_matches:
+            # Abusive regardless of the rest: skip the URL, repeated-char and payment
+            # passes, and leave URL redaction until an LLM prompt actually needs it.
+            return {
+                "phones": phones_found,
+                "urls": [],
+                "profanity": profane_matches,
+                "repeated": False,
+                "payment_terms": [],
+                "redacted": redacted,
+                "url_redaction_pending": _may_match(URL_ID),
+            }
+
+        urls_norm: List[str] = []
+        if _may_match(URL_ID):
+            urls_norm = self._find_urls(msg)
+            redacted = self._redact_urls(redacted)
+
+        return {
+            "phones": phones_found,
+            "urls": urls_norm,
+            "profanity": profane_matches,
+            "repeated": bool(_may_match(REPEATED_ID) and self.REPEATED_CHAR_PATTERN.search(msg)),
+            "payment_terms": self._match_payment(lower) if _may_match(PAYMENT_ID) else [],
+            "redacted": redacted,
+            "url_redaction_pending": False,
+        }
+
+    # ------ native extension, built once per class; None when off or unavailable ------
+    def _native_detector(self) -> Optional[Any]:
+        if not self.USE_NATIVE:
+            return None
+        cls = type(self)
+        if not cls._native_built:
+            with cls._native_lock:
+                if not cls._native_built:
+                    cls._native = _load_native_detector(
+                        cls.PHONE_COMBINED.pattern, cls.URL_PATTERN.pattern, cls.PROFANITY_RE.pattern, cls.PAYMENT_KEYWORDS
+                    )
+                    cls._native_built = True
+        return self._native
+
+    # ------ raw detections, native extension (None when it can't handle the text) ------
+    def _native_scan(self, native: Any, msg: str, lower: str) -> Optional[Dict[str, Any]]:
+        found = native.detect(msg, lower)
+        if found is None:
+            return None
+        phones, urls, profanity, payment_terms, repeated = found
+        # redact whatever was found, then report the same fields as the Python early exit
+        redacted = self._redact_for_prompt(msg) if (phones or urls) else msg
+        if profanity:
+            urls, payment_terms, repeated = [], [], False
+        return {
+            "phones": phones,
+            "urls": urls,
+            "profanity": profanity,
+            "repeated": repeated,
+            "payment_terms": payment_terms,
+            "redacted": redacted,
+            "url_redaction_pending": False,
+        }
 
     # ------ core detector (same logic you had) ------
     def _detailed_moderation(self, message: str) -> Dict[str, Any]:
-        msg = (message or "").strip()
+        # only the first MAX_SCAN_CHARS are scanned (and sent to the LLM): every detector
+        # is linear, so this bounds the work and prompt size per message; a longer
+        # message is labelled "truncated" and never reported safe
+        text = (message or "").strip()
+        detailed = self._detect(text[:self.MAX_SCAN_CHARS], len(text) > self.MAX_SCAN_CHARS)
+        # the cached dict is shared between calls: hand out a copy of its mutable parts
+        return {
+            **detailed,
+            "original_message": message,
+            "labels": list(detailed["labels"]),
+            "matches": {k: list(v) for k, v in detailed["matches"].items()},
+        }
+
+    async def _detailed_moderation_async(self, *messages: str) -> List[Dict[str, Any]]:
+        # detection is CPU-bound: keep long input off the event loop so it can't
+        # stall the other requests being served
+        if sum(len(m or "") for m in messages) > self.OFFLOAD_SCAN_CHARS:
+            return await asyncio.to_thread(lambda: [self._detailed_moderation(m) for m in messages])
+        return [self._detailed_moderation(m) for m in messages]
+
+    def _detect(self, msg: str, truncated: bool) -> Dict[str, Any]:
         lower = msg.lower()
         labels: List[str] = []
         reasons: List[str] = []
 
+        native = self._native_detector()
+        found = self._native_scan(native, msg, lower) if native is not None else None
+        if found is None:
+            found = self._scan(msg, lower)
+        phones_found = found["phones"]
+        urls_norm = found["urls"]
+        profane_matches = found["profanity"]
+        payment_hits = found["payment_terms"]
+        redacted = found["redacted"]
+
         # phones
-        phones_found: List[str] = []
-        for pat in self.PHONE_PATTERNS:
-            found = pat.findall(msg)
-            for f in found:
-                if isinstance(f, tuple):
-                    f = next((x for x in f if x), "")
-                if f:
-                    phones_found.append(re.sub(r"[^\d\+]", "", f))
         if phones_found:
             labels.append("contains_phone")
             reasons.append("Phone-like pattern(s) detected")
 
         # urls
-        urls = self.URL_PATTERN.findall(msg)
-        urls_norm = []
-        for u in urls:
-            if isinstance(u, tuple):
-                urls_norm.append(next((p for p in u if p), ""))
-            else:
-                urls_norm.append(u)
-        urls_norm = [u for u in urls_norm if u]
         if urls_norm:
             labels.append("contains_url")
             reasons.append("URL or domain detected")
@@ -92,25 +390,25 @@ class ChatModerationAgent:
                 reasons.append("Short message with URL → possible spam")
 
         # profanity
-        profane_matches: List[str] = []
-        for word in self.PROFANITY:
-            if re.search(rf"\b{re.escape(word)}\b", lower):
-                profane_matches.append(word)
         if profane_matches:
             labels.append("abusive")
             reasons.append("Profanity or insulting language found")
 
         # repeated char spam
-        if self.REPEATED_CHAR_PATTERN.search(msg):
+        if found["repeated"]:
             labels.append("possible_spam")
             reasons.append("Repeated characters (spam-like)")
 
         # payment terms
-        payment_hits = [k for k in self.PAYMENT_KEYWORDS if k in lower]
         if payment_hits:
             labels.append("payment_request")
             reasons.append("Message requests payment or transfer")
 
+        # anything past the scanned prefix is unchecked
+        if truncated:
+            labels.append("truncated")
+            reasons.append(f"Message longer than {self.MAX_SCAN_CHARS} characters, only the start was scanned")
+
         # decide final status token
         if "abusive" in labels:
             final_decision = "abusive"
@@ -128,7 +426,8 @@ class ChatModerationAgent:
             "status": final_decision,
             "labels": labels,
             "reason": " | ".join(reasons) if reasons else "No issues detected.",
-            "original_message": message,
+            "redacted_message": redacted,
+            "url_redaction_pending": found["url_redaction_pending"],
             "matches": {
                 "phones": phones_found,
                 "urls": urls_norm,
@@ -137,30 +436,36 @@ class ChatModerationAgent:
             },
         }
 
+    # ------ replace phone-like sequences with [PHONE] until none are left ------
+    def _redact_phones(self, text: str) -> str:
+        # a single pass of the alternation can take "+91 9876543210" off the front of a
+        # longer digit run and leave the rest unmatched, so re-scan the redacted text;
+        # every replacement removes digits, so this terminates
+        while True:
+            text, n = self.PHONE_COMBINED.subn("[PHONE]", text)
+            if not n:
+                return text
+
     # ------ redact PII for safe LLM prompt ------
     def _redact_for_prompt(self, text: str) -> str:
         # replace phone-like sequences with [PHONE], URLs with [URL]
         t = text
         # redact phones
-        for pat in self.PHONE_PATTERNS:
-            t = pat.sub("[PHONE]", t)
+        t = self._redact_phones(t)
         # redact URLs
-        t = self.URL_PATTERN.sub("[URL]", t)
+        t = self._redact_urls(t)
         return t
 
-    # ------ call LLM to get reason & description ------
-    def _generate_llm_explanation(self, detailed: Dict[str, Any]) -> Optional[Dict[str, str]]:
-        """
-        Returns {"reason": "<short reason>", "description":"<longer description>"} or None
-        """
-        if not self.llm:
-            return None
+    # ------ message text that is safe to put in an LLM prompt ------
+    def _prompt_message(self, detailed: Dict[str, Any]) -> str:
+        text = detailed.get("redacted_message", "")
+        if detailed.get("url_redaction_pending"):
+            text = self._redact_urls(text)
+        return text
 
-        status = detailed.get("status", "flagged")
-        labels = detailed.get("labels", [])
+    # ------ non-PII summary of what the detector matched ------
+    def _observed_summary(self, detailed: Dict[str, Any]) -> str:
         matches = detailed.get("matches", {})
-
-        # Build non-PII observation text
         observed_parts = []
         if matches.get("phones"):
             observed_parts.append(f"{len(matches['phones'])} phone-like pattern(s)")
@@ -170,35 +475,34 @@ class ChatModerationAgent:
             observed_parts.append("insulting language")
         if matches.get("payment_terms"):
             observed_parts.append("payment request")
-        observed = ", ".join(observed_parts) if observed_parts else "no explicit matches"
+        return ", ".join(observed_parts) if observed_parts else "no explicit matches"
 
-        # Prepare a safe, short prompt (explicit no-PII instruction)
-        prompt = (
+    # ------ safe, short prompt (explicit no-PII instruction) ------
+    def _explanation_prompt(self, detailed: Dict[str, Any]) -> str:
+        status = detailed.get("status", "flagged")
+        labels = detailed.get("labels", [])
+        observed = self._observed_summary(detailed)
+        # only the redacted message goes in, next to the high-level observed summary
+        return (
             "You are a concise moderation assistant. Produce two outputs in JSON form only:\n"
             '{ "reason": "<one short sentence, <=20 words>", "description": "<2-3 sentence explanation (no PII)>" }\n\n'
             "IMPORTANT: Do NOT include or repeat any phone numbers, emails, or full URLs. "
             "If PII exists, generalize as 'phone number' or 'URL'.\n\n"
             f"Detection summary: status={status}, observed={observed}, labels={labels}\n"
-            f"Redacted user message: {self._redact_for_prompt(detailed.get('original_message',''))}\n\n"
+            f"Redacted user message: {self._prompt_message(detailed)}\n\n"
             "Write a helpful, factual reason (one short sentence) and a slightly longer description (2-3 sentences)."
         )
 
-
-        # Redact the original message when including sample context (we avoid including PII)
-        # but keep the high-level observed summary above (we already did).
-        try:
-            raw = self.llm(prompt)
-        except Exception:
-            return None
-
+    # ------ pull reason & description out of an LLM reply ------
+    def _parse_explanation(self, raw: Optional[str]) -> Optional[Dict[str, str]]:
         if not raw:
             return None
 
         # Try to extract JSON-like reason & description via regex
         text = raw.strip()
         # Try find JSON fields
-        m_reason = re.search(r'"reason"\s*:\s*"([^"]{1,400}?)"', text)
-        m_desc = re.search(r'"description"\s*:\s*"([^"]{1,2000}?)"', text)
+        m_reason = _REASON_RE.search(text)
+        m_desc = _DESC_RE.search(text)
         if m_reason and m_desc:
             return {"reason": m_reason.group(1).strip(), "description": m_desc.group(1).strip()}
 
@@ -209,35 +513,72 @@ class ChatModerationAgent:
             return {"reason": lines[0], "description": " ".join(lines[1:])}
         if len(lines) == 1:
             # Use first sentence as reason, whole line as description
-            first_sentence = re.split(r"[.!?]\s+", lines[0])[0]
+            first_sentence = _SENT_SPLIT_RE.split(lines[0])[0]
             return {"reason": first_sentence, "description": lines[0]}
 
         # fallback: none
         return None
 
-    # ------ public API: returns status + reason + description (LLM-powered if available) ------
-    def moderate(self, message: str) -> Dict[str, Any]:
+    # ------ call LLM to get reason & description ------
+    async def _generate_llm_explanation(self, detailed: Dict[str, Any]) -> Optional[Dict[str, str]]:
         """
-        Returns:
-          {
-            "status": "<CapitalizedStatus>",
-            "reason": "<short reason>",
-            "description": "<longer description>",
-            "matches": { "phones": [...], "urls": [...], "payment_terms": [...] }  # only if found
-          }
+        Returns {"reason": "<short reason>", "description":"<longer description>"} or None
         """
-        detailed = self._detailed_moderation(message)
+        if not self.llm:
+            return None
+
+        try:
+            raw = await self.llm(self._explanation_prompt(detailed))
+        except Exception:
+            return None
+
+        return self._parse_explanation(raw)
+
+    # ------ one LLM call explaining several detections ------
+    async def _generate_llm_explanations(self, batch: List[Dict[str, Any]]) -> Dict[int, Dict[str, str]]:
+        """
+        Returns {<1-based index in batch>: {"reason": ..., "description": ...}} for every item
+        the model answered; missing items fall back to the rule-based reason.
+        """
+        if not self.llm or not batch:
+            return {}
+
+        items = "\n".join(
+            f"{i}. status={d.get('status', 'flagged')}, observed={self._observed_summary(d)}, "
+            f"labels={d.get('labels', [])}, redacted message: {self._prompt_message(d)}"
+            for i, d in enumerate(batch, start=1)
+        )
+        prompt = (
+            "You are a concise moderation assistant. For each numbered message below, produce one entry "
+            "of a JSON array only:\n"
+            '[{ "i": <message number>, "reason": "<one short sentence, <=20 words>", '
+            '"description": "<2-3 sentence explanation (no PII)>" }, ...]\n\n'
+            "IMPORTANT: Do NOT include or repeat any phone numbers, emails, or full URLs. "
+            "If PII exists, generalize as 'phone number' or 'URL'.\n\n"
+            f"Messages:\n{items}"
+        )
+
+        try:
+            # the client's default max_tokens only fits a few entries; a cut-off
+            # reply would silently drop the later messages to the rule text
+            raw = await self.llm(prompt, max_tokens=self.BATCH_TOKENS_PER_ITEM * len(batch))
+        except Exception:
+            return {}
+
+        out: Dict[int, Dict[str, str]] = {}
+        for m in _BATCH_ITEM_RE.finditer(raw or ""):
+            idx = int(m.group(1))
+            if 1 <= idx <= len(batch):
+                out[idx] = {"reason": m.group(2).strip(), "description": m.group(3).strip()}
+        return out
+
+    # ------ final response shape shared by moderate / moderate_many ------
+    def _build_result(self, detailed: Dict[str, Any], llm_out: Optional[Dict[str, str]]) -> Dict[str, Any]:
         status_key = detailed.get("status", "flagged")
         capital, fallback_reason = self.STATUS_MAP.get(
             status_key, ("Flagged", "Contains content that needs review")
         )
 
-        # include the redacted original for LLM context
-        redacted_msg = self._redact_for_prompt(message)
-        detailed["redacted_message"] = redacted_msg
-
-        # Try LLM for explanation (safe prompt + redaction done)
-        llm_out = self._generate_llm_explanation(detailed)
         if llm_out:
             reason = llm_out.get("reason", fallback_reason)
             description = llm_out.get("description", detailed.get("reason", fallback_reason))
@@ -249,7 +590,7 @@ class ChatModerationAgent:
         matches = {}
         for key in ["phones", "urls", "payment_terms"]:
             if detailed["matches"].get(key):
-                matches[key] = detailed["matches"][key]
+                matches[key] = list(detailed["matches"][key])
 
         return {
             "status": capital,
@@ -257,3 +598,76 @@ class ChatModerationAgent:
             "description": description,
             "matches": matches,
         }
+
+    # ------ public API: returns status + reason + description (LLM-powered if available) ------
+    async def moderate(self, message: str) -> Dict[str, Any]:
+        """
+        Returns:
+          {
+            "status": "<CapitalizedStatus>",
+            "reason": "<short reason>",
+            "description": "<longer description>",
+            "matches": { "phones": [...], "urls": [...], "payment_terms": [...] }  # only if found
+          }
+        """
+        detailed = (await self._detailed_moderation_async(message))[0]
+
+        # Try LLM for explanation (safe prompt + redaction done)
+        llm_out = await self._generate_llm_explanation(detailed)
+        return self._build_result(detailed, llm_out)
+
+    async def moderate_many(self, messages: List[str]) -> List[Dict[str, Any]]:
+        """
+        Moderate several messages, packing up to BATCH_SIZE of them into each LLM prompt,
+        with at most MAX_CONCURRENCY prompts in flight.
+        Returns one result per message, in order, shaped like `moderate()`.
+        """
+        detailed = await self._detailed_moderation_async(*messages)
+        chunks = [detailed[i:i + self.BATCH_SIZE] for i in range(0, len(detailed), self.BATCH_SIZE)]
+        explained = await gather_bounded(
+            (self._generate_llm_explanations(c) for c in chunks), self.MAX_CONCURRENCY
+        )
+
+        results = []
+        for chunk, llm_outs in zip(chunks, explained):
+            for i, d in enumerate(chunk, start=1):
+                results.append(self._build_result(d, llm_outs.get(i)))
+        return results
+
+    async def moderate_stream(self, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Like `moderate()`, but streams the LLM explanation. Yields:
+          {"event": "reason", "status": ..., "reason": ...}  as soon as the reason is complete
+          {"event": "error", "detail": ...}                  if the LLM call fails mid-way
+          {"event": "result", **moderate()-shaped result}    always last
+        """
+        detailed = (await self._detailed_moderation_async(message))[0]
+        if not self.llm:
+            yield {"event": "result", **self._build_result(detailed, None)}
+            return
+
+        capital, _ = self.STATUS_MAP.get(detailed.get("status", "flagged"), ("Flagged", ""))
+        buffer = ""
+        streamed_reason = None
+        try:
+            chunks = await self.llm(self._explanation_prompt(detailed), stream=True)
+            async for chunk in chunks:
+                buffer += chunk
+                if streamed_reason is None:
+                    m_reason = _REASON_RE.search(buffer)
+                    if m_reason:
+                        streamed_reason = m_reason.group(1).strip()
+                        yield {"event": "reason", "status": capital, "reason": streamed_reason}
+        except Exception as e:
+            # still finish with a result built from whatever arrived
+            yield {"event": "error", "detail": f"LLM explanation failed: {e}"}
+
+        if streamed_reason is None:
+            llm_out = self._parse_explanation(buffer)
+        else:
+            # the client already shows this reason; the result must not contradict it
+            llm_out = {"reason": streamed_reason}
+            m_desc = _DESC_RE.search(buffer)
+            if m_desc:
+                llm_out["description"] = m_desc.group(1).strip()
+        yield {"event": "result", **self._build_result(detailed, llm_out)}
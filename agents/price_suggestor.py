@@ -1,10 +1,33 @@
 # agents/price_suggestor.py
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-import statistics
+import re
+
+import numpy as np
+import pandas as pd
 
 # comparables module
-from utils.comparables import get_comparables
+from utils.comparables import get_comparables_async
+from utils.concurrency import gather_bounded
+
+# one {"i": .., "reasoning": ..} entry of a batched LLM reply
+_BATCH_REASONING_RE = re.compile(r'\{\s*"i"\s*:\s*(\d+)\s*,\s*"reasoning"\s*:\s*"([^"]{1,2000}?)"\s*\}')
+
+
+def _depreciation_factor(months: int, rule: dict) -> float:
+    first_n = rule["fast_decay_months"]
+    monthly = rule["monthly_rate"]
+    if months <= first_n:
+        return (1 - monthly) ** months
+    factor_first = (1 - monthly) ** first_n
+    remainder = months - first_n
+    factor_after = (1 - monthly * 0.6) ** remainder
+    return factor_first * factor_after
+
+
+def _factor_table(rule: dict, months: int) -> tuple:
+    # a tuple of Python floats indexes faster than a NumPy array for single lookups
+    return tuple(_depreciation_factor(m, rule) for m in range(months + 1))
 
 
 class ProductInput(BaseModel):
@@ -43,8 +66,19 @@ class PriceSuggestorAgent:
         "samsung": 0.03
     }
 
+    FACTOR_TABLE_MONTHS = 120  # ages up to this are a table lookup in _depreciate
+    # precompute each category's depreciation curve while the class is built;
+    # rules without a table (or older items) fall back to _depreciation_factor
+    for _rule in CATEGORY_RULES.values():
+        _rule["factor_table"] = _factor_table(_rule, FACTOR_TABLE_MONTHS)
+    del _rule
+
     METRO_CITIES = {"mumbai", "delhi", "bangalore", "chennai", "hyderabad", "pune", "kolkata"}
 
+    BATCH_SIZE = 10  # products per LLM prompt in suggest_many
+    BATCH_TOKENS_PER_ITEM = 200  # reply budget per product: 3-4 sentence reasoning + JSON
+    MAX_CONCURRENCY = 4  # comparables lookups / LLM calls in flight per batch
+
     def __init__(self, llm_client=None):
         self.llm = llm_client
 
@@ -64,21 +98,18 @@ class PriceSuggestorAgent:
             return self.CATEGORY_RULES["fashion"]
         return self.CATEGORY_RULES["other"]
 
+    _depreciation_factor = staticmethod(_depreciation_factor)
+
     def _depreciate(self, base_price: float, months: int, rule: dict):
         if months <= 0:
             return base_price
-        first_n = rule["fast_decay_months"]
-        monthly = rule["monthly_rate"]
-        cap_floor = rule["cap_floor"]
-        if months <= first_n:
-            factor = (1 - monthly) ** months
+        table = rule.get("factor_table")
+        if table is not None and months < len(table):
+            factor = table[months]
         else:
-            factor_first = (1 - monthly) ** first_n
-            remainder = months - first_n
-            factor_after = (1 - monthly * 0.6) ** remainder
-            factor = factor_first * factor_after
+            factor = self._depreciation_factor(months, rule)
         depreciated = base_price * factor
-        floor_price = base_price * cap_floor
+        floor_price = base_price * rule["cap_floor"]
         return max(depreciated, floor_price)
 
     def _condition_range(self, condition: str):
@@ -100,7 +131,14 @@ class PriceSuggestorAgent:
                 return v
         return 0.0
 
-    def suggest(self, data: ProductInput) -> Dict[str, Any]:
+    def _comparables_median(self, comps: List[Dict[str, Any]]) -> Optional[int]:
+        """Median comparable price (already robust to a few mis-scraped prices)."""
+        prices = np.fromiter((c["price"] for c in comps if c.get("price")), dtype=np.int64)
+        if not prices.size:
+            return None
+        return int(np.median(prices))
+
+    async def _heuristic_suggestion(self, data: ProductInput) -> Dict[str, Any]:
         if data.asking_price is None:
             raise ValueError("asking_price required for heuristic suggestion.")
 
@@ -141,11 +179,10 @@ class PriceSuggestorAgent:
         comparables = []
         if data.use_comparables:
             try:
-                comps = get_comparables(data.title, location=data.location, max_results=8)
+                comps = await get_comparables_async(data.title, location=data.location, max_results=8)
                 comparables = comps
-                prices = [c["price"] for c in comps if c.get("price")]
-                if prices:
-                    median_price = int(statistics.median(prices))
+                median_price = self._comparables_median(comps)
+                if median_price is not None:
                     comp_min, comp_max = int(median_price * 0.95), int(median_price * 1.05)
                     new_min = round_price(min_price * 0.4 + comp_min * 0.6)
                     new_max = round_price(max_price * 0.4 + comp_max * 0.6)
@@ -158,25 +195,143 @@ class PriceSuggestorAgent:
             except Exception:
                 pass
 
+        return {
+            "fair_price_range": fair_price_range,
+            "reasoning": reasoning,
+            "comparables": comparables
+        }
+
+    def suggest_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Heuristic fair price range for every row of a product frame (the columns of
+        ProductInput), computed column-wise in NumPy rather than row by row through
+        _heuristic_suggestion. No comparables or LLM reasoning. Returns depreciated,
+        min_price and max_price on df's index; rows without an asking_price are NA.
+        """
+        # per-distinct-value lookups, then a gather back onto the rows
+        cat_codes, cats = pd.factorize(df["category"].astype(str))
+        rules = [self._get_category_rule(c) for c in cats]
+        monthly = np.array([r["monthly_rate"] for r in rules])[cat_codes]
+        fast_n = np.array([r["fast_decay_months"] for r in rules])[cat_codes]
+        floor = np.array([r["cap_floor"] for r in rules])[cat_codes]
+
+        cond_codes, conds = pd.factorize(df["condition"].astype(str))
+        cond_min, cond_max = np.array([self._condition_range(c) for c in conds]).reshape(-1, 2)[cond_codes].T
+
+        brand_codes, brands = pd.factorize(df["brand"].fillna("").astype(str))
+        brand_adj = np.array([self._brand_adj(b) for b in brands])[brand_codes]
+
+        location = df["location"].fillna("").astype(str).str.strip().str.lower()
+        metro = location.isin(self.METRO_CITIES).to_numpy()
+        loc_adj_min = np.where(metro, 0.0, -0.05)
+        loc_adj_max = np.where(metro, 0.05, 0.0)
+
+        base = pd.to_numeric(df["asking_price"], errors="coerce").to_numpy(dtype=float)
+        months = pd.to_numeric(df["age_months"], errors="coerce").to_numpy(dtype=float)
+
+        # same piecewise curve as _depreciation_factor; age <= 0 means no depreciation
+        factor = np.where(
+            months <= fast_n,
+            (1 - monthly) ** months,
+            (1 - monthly) ** fast_n * (1 - 0.6 * monthly) ** (months - fast_n),
+        )
+        depreciated = np.where(months <= 0, base, np.maximum(base * factor, base * floor))
+
+        raw_min = depreciated * cond_min * (1 + loc_adj_min)
+        raw_max = depreciated * cond_max * (1 + brand_adj + loc_adj_max)
+
+        def round_price(x):
+            return np.where(x >= 20000, np.round(x / 100.0) * 100, np.round(x / 50.0) * 50)
+
+        min_price = np.maximum(50, round_price(raw_min))
+        max_price = np.maximum(min_price + 50, round_price(raw_max))
+
+        return pd.DataFrame(
+            {
+                "depreciated": depreciated,
+                "min_price": pd.array(min_price, dtype="Int64"),
+                "max_price": pd.array(max_price, dtype="Int64"),
+            },
+            index=df.index,
+        )
+
+    def _product_summary(self, data: ProductInput, result: Dict[str, Any]) -> str:
+        comparables = result["comparables"]
+        return (
+            f"Product: {data.title} ({data.category}, brand={data.brand}), "
+            f"age={data.age_months} months, condition={data.condition}, "
+            f"asking_price={data.asking_price}. "
+            f"Heuristic fair price: {result['fair_price_range']}. "
+            f"Comparables: {comparables if comparables else 'none'}."
+        )
+
+    async def suggest(self, data: ProductInput) -> Dict[str, Any]:
+        result = await self._heuristic_suggestion(data)
+
         if data.use_llm and self.llm:
             try:
                 prompt = (
                     "You are a pricing assistant for used products. "
-                    f"Product: {data.title} ({data.category}, brand={data.brand}), "
-                    f"age={data.age_months} months, condition={data.condition}, "
-                    f"asking_price={data.asking_price}. "
-                    f"Heuristic fair price: {fair_price_range}. "
-                    f"Comparables: {comparables if comparables else 'none'}. "
+                    f"{self._product_summary(data, result)} "
                     "Give a short natural language reasoning and optionally suggest a refined range. "
                     "Answer in 3-4 sentences."
                 )
-                llm_text = self.llm(prompt)
-                reasoning = llm_text
+                llm_text = await self.llm(prompt)
+                result["reasoning"] = llm_text
             except Exception:
                 pass
 
-        return {
-            "fair_price_range": fair_price_range,
-            "reasoning": reasoning,
-            "comparables": comparables
-        }
+        return result
+
+    async def _batch_reasoning(self, batch: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        One LLM call reasoning about several {"product", "result"} pairs. Returns
+        {<1-based index in batch>: reasoning} for every item the model answered.
+        """
+        items = "\n".join(
+            f"{n}. {self._product_summary(b['product'], b['result'])}" for n, b in enumerate(batch, start=1)
+        )
+        prompt = (
+            "You are a pricing assistant for used products. For each numbered product below, "
+            "give a short natural language reasoning (3-4 sentences) and optionally suggest a refined range. "
+            'Answer with a JSON array only: [{ "i": <product number>, "reasoning": "<text>" }, ...]\n\n'
+            f"Products:\n{items}"
+        )
+        try:
+            raw = await self.llm(prompt, max_tokens=self.BATCH_TOKENS_PER_ITEM * len(batch))
+        except Exception:
+            return {}
+
+        out: Dict[int, str] = {}
+        for m in _BATCH_REASONING_RE.finditer(raw or ""):
+            n = int(m.group(1))
+            if 1 <= n <= len(batch):
+                out[n] = m.group(2).strip()
+        return out
+
+    async def suggest_many(self, products: List[ProductInput]) -> List[Dict[str, Any]]:
+        """
+        Price several products, asking the LLM for the reasoning of up to BATCH_SIZE
+        products per prompt instead of one request each. At most MAX_CONCURRENCY
+        lookups / LLM calls run at once. Results keep input order; a product that
+        cannot be priced gets {"error": "<message>"} instead.
+        """
+        results = await gather_bounded(
+            (self._heuristic_suggestion(p) for p in products), self.MAX_CONCURRENCY, return_exceptions=True
+        )
+        results = [{"error": str(r)} if isinstance(r, Exception) else r for r in results]
+        if not self.llm:
+            return results
+
+        wanted = [i for i, p in enumerate(products) if p.use_llm and "error" not in results[i]]
+        chunks = [wanted[i:i + self.BATCH_SIZE] for i in range(0, len(wanted), self.BATCH_SIZE)]
+        explained = await gather_bounded(
+            (self._batch_reasoning([{"product": products[i], "result": results[i]} for i in c]) for c in chunks),
+            self.MAX_CONCURRENCY,
+        )
+        for chunk, reasoning in zip(chunks, explained):
+            for n, i in enumerate(chunk, start=1):
+                if n in reasoning:
+                    results[i]["reasoning"] = reasoning[n]
+
+        return results
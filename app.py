@@ -1,13 +1,19 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
 import os
-import csv
+from typing import Dict, Optional
+from pydantic import conlist
+
+import pandas as pd
 
 from agents.price_suggestor import PriceSuggestorAgent, ProductInput
 from agents.chat_moderator import ChatModerationAgent, ModerateInput
 from utils.llm import get_llm_client
+from utils.comparables import close_http_client
 
-app = FastAPI(title="Marketplace Agents API")
+app = FastAPI(title="Marketplace Agents API", default_response_class=ORJSONResponse)
 
 # ---- CORS Setup ----
 app.add_middleware(
@@ -27,57 +33,188 @@ price_agent = PriceSuggestorAgent(llm_client=llm_client)
 moderator = ChatModerationAgent(llm_client=llm_client)
 
 
+@app.on_event("shutdown")
+async def _close_http_client():
+    await close_http_client()
+
+
+# ---- Batch limits (larger batches are rejected with 422) ----
+MAX_BATCH_ITEMS = 50
+
+
+# ---- Sample catalogue (parsed once, looked up by id) ----
+PRODUCTS_PATH = os.path.join("data", "products.csv")
+
+
+def _load_products(path: str = PRODUCTS_PATH) -> Optional[pd.DataFrame]:
+    """
+    Parse the CSV with pandas' C reader; None when the file is missing. Cells are read as
+    text with no NA guessing (a brand literally called "NA" stays "NA"); only empty cells
+    become missing. ProductInput does the type checks, one row at a time.
+    """
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return df.mask(df == "")
+
+
+def _index_products(df: Optional[pd.DataFrame]) -> Optional[Dict[int, ProductInput]]:
+    """Build {id: ProductInput} once so /load_sample is a dict lookup; bad rows are skipped."""
+    if df is None:
+        return None
+
+    products: Dict[int, ProductInput] = {}
+    for line, row in enumerate(df.to_dict("records"), start=2):
+        row = {k: (None if pd.isna(v) else v) for k, v in row.items()}
+        try:
+            inp = ProductInput(**row)
+            if inp.id is None:
+                raise ValueError("missing id")
+        except ValueError as e:  # pydantic's ValidationError is a ValueError
+            print(f"⚠️ Skipping bad product row (line {line}):", e)
+            continue
+        products[inp.id] = inp
+    return products
+
+
+def _products_frame(products: Optional[Dict[int, ProductInput]]) -> Optional[pd.DataFrame]:
+    """The validated products as a typed frame for suggest_batch, indexed by id."""
+    if products is None:
+        return None
+    rows = [p.dict() for p in products.values()]
+    return pd.DataFrame(rows, columns=list(ProductInput.__fields__)).set_index("id", drop=False)
+
+
+_PRODUCTS = _index_products(_load_products(PRODUCTS_PATH))
+_PRODUCTS_DF = _products_frame(_PRODUCTS)
+
+
 # ---- Routes ----
 @app.post("/negotiate")
-def negotiate(payload: ProductInput):
+async def negotiate(payload: ProductInput):
     """
     Suggest a fair price range for a product.
     Falls back to heuristic if no LLM is available.
     """
     try:
-        return price_agent.suggest(payload)
+        return await price_agent.suggest(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Negotiation failed: {str(e)}")
 
 
 @app.post("/moderate")
-def moderate(payload: ModerateInput):
+async def moderate(payload: ModerateInput):
     """
     Moderate a chat message for safety/toxicity.
     """
     try:
-        result = moderator.moderate(payload.message)
+        result = await moderator.moderate(payload.message)
         return {"moderated": True, "result": result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Moderation failed: {str(e)}")
 
 
+@app.post("/moderate_stream")
+async def moderate_stream(payload: ModerateInput):
+    """
+    Moderate a chat message, streaming the LLM explanation as server-sent events:
+    a "reason" event as soon as the short reason is generated, then the full "result".
+    """
+    def sse(name: str, data: Dict) -> str:
+        return f"event: {name}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+    async def events():
+        # the 200 is already sent once streaming starts, so failures become an error event
+        try:
+            async for event in moderator.moderate_stream(payload.message):
+                yield sse(event.pop("event"), event)
+        except Exception as e:
+            yield sse("error", {"detail": f"Moderation failed: {e}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/negotiate_batch")
+async def negotiate_batch(payload: conlist(ProductInput, max_items=MAX_BATCH_ITEMS) = Body(...)):
+    """
+    Suggest fair price ranges for several products (at most MAX_BATCH_ITEMS),
+    batching the LLM reasoning calls.
+    """
+    try:
+        return await price_agent.suggest_many(payload)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Negotiation failed: {str(e)}")
+
+
+@app.post("/moderate_batch")
+async def moderate_batch(payload: conlist(ModerateInput, max_items=MAX_BATCH_ITEMS) = Body(...)):
+    """
+    Moderate several chat messages (at most MAX_BATCH_ITEMS), batching the LLM explanation calls.
+    """
+    try:
+        results = await moderator.moderate_many([p.message for p in payload])
+        return {"moderated": True, "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Moderation failed: {str(e)}")
+
+
 @app.get("/load_sample/{row_id}")
-def load_sample(row_id: int):
+async def load_sample(row_id: int):
     """
     Load a sample product from data/products.csv and run price suggestion.
     """
-    path = os.path.join("data", "products.csv")
-    if not os.path.exists(path):
+    if _PRODUCTS is None:
         raise HTTPException(status_code=404, detail="data/products.csv not found")
 
+    inp = _PRODUCTS.get(row_id)
+    if inp is None:
+        raise HTTPException(status_code=404, detail="Row not found")
+
     try:
-        with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for r in reader:
-                if int(r["id"]) == row_id:
-                    inp = ProductInput(
-                        id=int(r["id"]),
-                        title=r["title"],
-                        category=r["category"],
-                        brand=r.get("brand"),
-                        condition=r["condition"],
-                        age_months=int(r["age_months"]),
-                        asking_price=float(r["asking_price"]) if r.get("asking_price") else None,
-                        location=r.get("location"),
-                    )
-                    return price_agent.suggest(inp)
+        return await price_agent.suggest(inp)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load sample: {str(e)}")
 
-    raise HTTPException(status_code=404, detail="Row not found")
+
+@app.get("/load_samples")
+async def load_samples():
+    """
+    Heuristic price ranges for every product in data/products.csv, computed in one batch.
+    """
+    if _PRODUCTS_DF is None:
+        raise HTTPException(status_code=404, detail="data/products.csv not found")
+
+    try:
+        prices = price_agent.suggest_batch(_PRODUCTS_DF)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to price samples: {str(e)}")
+
+    results = []
+    for row_id, lo, hi in zip(_PRODUCTS_DF["id"], prices["min_price"], prices["max_price"]):
+        if pd.isna(lo):
+            results.append({"id": int(row_id), "fair_price_range": None})
+            continue
+        results.append({
+            "id": int(row_id),
+            "fair_price_range": {
+                "min": int(lo),
+                "max": int(hi),
+                "currency": "INR",
+                "display": f"₹{int(lo):,} - ₹{int(hi):,}"
+            }
+        })
+    return {"count": len(results), "results": results}
+
+
+@app.post("/reload_products")
+async def reload_products():
+    """
+    Re-read data/products.csv into the in-memory sample index.
+    """
+    global _PRODUCTS_DF, _PRODUCTS
+    try:
+        products = _index_products(_load_products(PRODUCTS_PATH))
+        _PRODUCTS, _PRODUCTS_DF = products, _products_frame(products)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reload products: {str(e)}")
+    return {"reloaded": _PRODUCTS is not None, "count": len(_PRODUCTS or {})}
@@ -0,0 +1,118 @@
+//! Native detector for `agents.chat_moderator.ChatModerationAgent`.
+//!
+//! The Python class stays the source of truth: it passes its own pattern
+//! strings and keyword list to `Detector`, and this module only runs them
+//! (linear-time `regex` + an Aho-Corasick automaton) in one call per message.
+
+use aho_corasick::AhoCorasick;
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+use regex::bytes::{Regex, RegexBuilder};
+
+/// Run length that counts as repeated-character spam (Python: `(.)\1{7}`).
+const REPEAT_RUN: usize = 8;
+
+/// (phones, urls, profanity, payment_terms, repeated_chars)
+type Detection = (Vec<String>, Vec<String>, Vec<String>, Vec<String>, bool);
+
+fn compile(pattern: &str) -> PyResult<Regex> {
+    // ASCII semantics: `detect` only accepts ASCII input, where they agree with Python's `re`.
+    RegexBuilder::new(pattern)
+        .unicode(false)
+        .build()
+        .map_err(|e| PyValueError::new_err(e.to_string()))
+}
+
+fn ascii_string(bytes: &[u8]) -> String {
+    bytes.iter().map(|&b| b as char).collect()
+}
+
+fn has_repeated_run(bytes: &[u8]) -> bool {
+    let mut run = 0;
+    let mut prev = None;
+    for &b in bytes {
+        run = if prev == Some(b) { run + 1 } else { 1 };
+        if run >= REPEAT_RUN {
+            return true;
+        }
+        prev = Some(b);
+    }
+    false
+}
+
+#[pyclass]
+struct Detector {
+    phone: Regex,
+    url: Regex,
+    profanity: Regex,
+    payment: AhoCorasick,
+    payment_keywords: Vec<String>,
+}
+
+#[pymethods]
+impl Detector {
+    #[new]
+    fn new(phone: &str, url: &str, profanity: &str, payment_keywords: Vec<String>) -> PyResult<Self> {
+        let payment = AhoCorasick::new(&payment_keywords).map_err(|e| PyValueError::new_err(e.to_string()))?;
+        Ok(Detector {
+            phone: compile(phone)?,
+            url: compile(url)?,
+            profanity: compile(profanity)?,
+            payment,
+            payment_keywords,
+        })
+    }
+
+    /// Run every detector over `msg` (and `lower`, its lowercased form).
+    ///
+    /// Returns None for non-ASCII text, \x0b or the ASCII separator controls
+    /// (0x1C-0x1F), where Python's Unicode `\s`/`\d`/`\b` or its RE2 path differ
+    /// from ASCII classes; the caller then uses its pure-Python path.
+    fn detect(&self, msg: &str, lower: &str) -> Option<Detection> {
+        let bytes = msg.as_bytes();
+        if bytes.iter().any(|&b| b >= 0x80 || b == 0x0b || (0x1c..=0x1f).contains(&b)) {
+            return None;
+        }
+
+        let phones = self
+            .phone
+            .find_iter(bytes)
+            .map(|m| m.as_bytes().iter().filter(|b| b.is_ascii_digit() || **b == b'+').map(|&b| b as char).collect())
+            .collect();
+
+        let urls = self
+            .url
+            .find_iter(bytes)
+            .filter(|m| !m.is_empty())
+            .map(|m| ascii_string(m.as_bytes()))
+            .collect();
+
+        let mut profanity: Vec<String> = Vec::new();
+        for m in self.profanity.find_iter(lower.as_bytes()) {
+            let word = ascii_string(m.as_bytes());
+            if !profanity.contains(&word) {
+                profanity.push(word);
+            }
+        }
+
+        let mut seen = vec![false; self.payment_keywords.len()];
+        for m in self.payment.find_overlapping_iter(lower) {
+            seen[m.pattern().as_usize()] = true;
+        }
+        let payment_terms = self
+            .payment_keywords
+            .iter()
+            .zip(seen)
+            .filter(|(_, hit)| *hit)
+            .map(|(k, _)| k.clone())
+            .collect();
+
+        Some((phones, urls, profanity, payment_terms, has_repeated_run(bytes)))
+    }
+}
+
+#[pymodule]
+fn moderation_rs(m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_class::<Detector>()?;
+    Ok(())
+}
@@ -1,3 +1,10 @@
+import asyncio
+import sys
+import time
+
+import pandas as pd
+import pytest
+
 from agents.price_suggestor import PriceSuggestorAgent, ProductInput
 from agents.chat_moderator import ChatModerationAgent
 
@@ -13,12 +20,201 @@ def test_price_suggestor_basic():
         asking_price=35000,
         location='Mumbai'
     )
-    out = agent.suggest(p)
+    out = asyncio.run(agent.suggest(p))
     assert 'fair_price_range' in out
     assert out['fair_price_range']['min'] <= out['fair_price_range']['max']
 
+def test_price_suggestor_batch_matches_suggest():
+    agent = PriceSuggestorAgent()
+    rows = [
+        dict(id=1, title='iPhone 12', category='Mobile', brand='Apple', condition='Good',
+             age_months=24, asking_price=35000, location='Mumbai'),
+        dict(id=2, title='Sofa', category='Furniture', brand=None, condition='Fair',
+             age_months=150, asking_price=12000, location='Nagpur'),
+        dict(id=3, title='Sneakers', category='Shoes', brand='Nike', condition='Like New',
+             age_months=0, asking_price=4000, location=None),
+        dict(id=4, title='Lamp', category='Other', brand=None, condition='Good',
+             age_months=6, asking_price=None, location='Delhi'),
+    ]
+    out = agent.suggest_batch(pd.DataFrame(rows).set_index('id', drop=False))
+    for row in rows[:3]:
+        expected = asyncio.run(agent.suggest(ProductInput(**row, use_llm=False)))['fair_price_range']
+        assert (out.loc[row['id'], 'min_price'], out.loc[row['id'], 'max_price']) == (expected['min'], expected['max'])
+    assert pd.isna(out.loc[4, 'min_price'])
+
+def test_price_suggestor_batch_reports_unpriceable_items():
+    prompts = []
+
+    async def fake_llm(prompt, max_tokens=512):
+        prompts.append(prompt)
+        return '[{"i": 1, "reasoning": "Priced against similar phones."}]'
+
+    agent = PriceSuggestorAgent(llm_client=fake_llm)
+    products = [
+        ProductInput(title='iPhone 12', category='Mobile', condition='Good', age_months=24, asking_price=35000),
+        ProductInput(title='Lamp', category='Other', condition='Good', age_months=6),
+    ]
+    out = asyncio.run(agent.suggest_many(products))
+    assert len(prompts) == 1
+    assert out[0]['reasoning'] == 'Priced against similar phones.'
+    assert 'asking_price' in out[1]['error']
+
+def test_batch_llm_calls_run_concurrently_up_to_the_limit():
+    in_flight, peak = 0, 0
+
+    async def fake_llm(prompt, max_tokens=512):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return '[]'
+
+    mod = ChatModerationAgent(llm_client=fake_llm)
+    asyncio.run(mod.moderate_many(['hello'] * (ChatModerationAgent.BATCH_SIZE * 6)))
+    assert 1 < peak <= ChatModerationAgent.MAX_CONCURRENCY
+
+    peak = 0
+    agent = PriceSuggestorAgent(llm_client=fake_llm)
+    product = ProductInput(title='Chair', category='Furniture', condition='Good', age_months=12, asking_price=2000)
+    out = asyncio.run(agent.suggest_many([product] * (PriceSuggestorAgent.BATCH_SIZE * 6)))
+    assert 1 < peak <= PriceSuggestorAgent.MAX_CONCURRENCY
+    assert all('fair_price_range' in r for r in out)
+
 def test_chat_moderator_phone_and_spam():
     mod = ChatModerationAgent()
     msg = 'Call me at 9876543210. Send rs.5000 to paytm.'
-    res = mod.moderate(msg)
-    assert 'contains_phone' in res['labels'] or 'payment_request' in res['labels']
+    res = asyncio.run(mod.moderate(msg))
+    assert res['status'] == 'Flagged'
+    assert res['matches']['phones'] == ['9876543210']
+    assert 'payment_terms' in res['matches']
+
+def test_chat_moderator_scans_long_messages_off_the_event_loop():
+    mod = ChatModerationAgent()
+    msg = 'is it available? ' * 100 + 'call 9876543210'
+    res = asyncio.run(mod.moderate(msg))
+    assert res['status'] == 'Unsafe'
+    assert asyncio.run(mod.moderate_many([msg, 'hello']))[0] == res
+
+def test_chat_moderator_redacts_every_phone_digit_run():
+    mod = ChatModerationAgent()
+    for msg in ['+91 98765432109876543210', '+91 987654321098765 43210']:
+        res = mod._detailed_moderation(msg)
+        assert not any(c.isdigit() for c in mod._prompt_message(res))
+        assert not any(c.isdigit() for c in mod._redact_for_prompt(msg))
+
+def test_chat_moderator_batch_uses_one_llm_call():
+    prompts = []
+
+    async def fake_llm(prompt, max_tokens=512):
+        prompts.append(prompt)
+        assert max_tokens >= ChatModerationAgent.BATCH_TOKENS_PER_ITEM * 2
+        return '[{"i": 2, "reason": "Shares a phone number", "description": "Asks to call off-platform."}]'
+
+    mod = ChatModerationAgent(llm_client=fake_llm)
+    res = asyncio.run(mod.moderate_many(['Is this still available?', 'Call me at 9876543210']))
+    assert len(prompts) == 1
+    assert '9876543210' not in prompts[0]
+    assert res[0]['status'] == 'Safe'
+    assert res[1]['status'] == 'Unsafe'
+    assert res[1]['reason'] == 'Shares a phone number'
+
+def _streaming_llm(*chunks, fail=False):
+    async def fake_llm(prompt, stream=False):
+        async def gen():
+            for c in chunks:
+                yield c
+            if fail:
+                raise RuntimeError('connection reset')
+        return gen()
+    return fake_llm
+
+def _collect_stream(mod, msg):
+    async def run():
+        return [e async for e in mod.moderate_stream(msg)]
+    return asyncio.run(run())
+
+def test_chat_moderator_stream_sends_reason_then_result():
+    llm = _streaming_llm('{"reason": "Shares a phone ', 'number", "descr', 'iption": "Asks to call off-platform."}')
+    events = _collect_stream(ChatModerationAgent(llm_client=llm), 'Call me at 9876543210')
+    assert [e['event'] for e in events] == ['reason', 'result']
+    assert events[0] == {'event': 'reason', 'status': 'Unsafe', 'reason': 'Shares a phone number'}
+    assert events[1]['reason'] == 'Shares a phone number'
+    assert events[1]['description'] == 'Asks to call off-platform.'
+
+def test_chat_moderator_stream_fallbacks():
+    # plain-text reply: no reason event, the result falls back to the line split
+    events = _collect_stream(ChatModerationAgent(llm_client=_streaming_llm('Looks fine.\n', 'Nothing risky here.')), 'hello')
+    assert [e['event'] for e in events] == ['result']
+    assert (events[0]['reason'], events[0]['description']) == ('Looks fine.', 'Nothing risky here.')
+
+    # reason streamed without a description: the result keeps that reason
+    events = _collect_stream(ChatModerationAgent(llm_client=_streaming_llm('{"reason": "Shares a phone"', fail=True)),
+                             'Call me at 9876543210')
+    assert [e['event'] for e in events] == ['reason', 'error', 'result']
+    assert 'connection reset' in events[1]['detail']
+    assert events[2]['reason'] == 'Shares a phone'
+
+    events = _collect_stream(ChatModerationAgent(), 'Call me at 9876543210')
+    assert [e['event'] for e in events] == ['result']
+    assert events[0] == {'event': 'result', **asyncio.run(ChatModerationAgent().moderate('Call me at 9876543210'))}
+
+def test_chat_moderator_url_stops_at_unicode_whitespace():
+    mod = ChatModerationAgent()
+    for sep in ['\x0b', '\xa0', '\u2003']:
+        res = mod._detailed_moderation(f'visit www.shop.com{sep}my number is private')
+        assert res['matches']['urls'] == ['www.shop.com']
+        assert ' my number' in mod._prompt_message(res).replace(sep, ' ')
+    assert mod._detailed_moderation('éboutique.com rocks')['matches']['urls'] == []
+
+def test_chat_moderator_url_scan_is_linear_on_unicode_text():
+    mod = ChatModerationAgent()
+    for msg in ['₹' + 'a.' * 20000, 'é' + 'a.ww' * 10000]:
+        start = time.perf_counter()
+        assert mod._find_urls(msg) == []
+        assert mod._redact_urls(msg) == msg
+        assert time.perf_counter() - start < 0.5
+    assert mod._find_urls('₹500 at shop.com or www.x.in/a, http://é.io') == ['shop.com', 'www.x.in/a,', 'http://é.io']
+
+def test_chat_moderator_flags_messages_past_the_scan_limit():
+    mod = ChatModerationAgent()
+    res = asyncio.run(mod.moderate('hello ' * 900 + 'call me 9876543210 pay via paytm www.scam.com idiot'))
+    assert res['status'] == 'Flagged'
+    assert 'truncated' in mod._detailed_moderation('a ' * ChatModerationAgent.MAX_SCAN_CHARS)['labels']
+    start = time.perf_counter()
+    assert mod._detailed_moderation('é' + 'a.' * 2600)['status'] == 'flagged'
+    assert time.perf_counter() - start < 0.5
+
+def test_chat_moderator_cached_results_are_not_shared():
+    mod = ChatModerationAgent()
+    first = mod._detailed_moderation('Call me at 9876543210')
+    first['labels'].clear()
+    first['matches']['phones'].append('0')
+    again = mod._detailed_moderation('Call me at 9876543210')
+    assert again['labels'] == ['contains_phone']
+    assert again['matches']['phones'] == ['9876543210']
+
+def test_native_detector_matches_python_path():
+    pytest.importorskip('moderation_rs')
+    native = ChatModerationAgent()
+    native.USE_NATIVE = True
+    python_only = ChatModerationAgent()
+    python_only._native = None
+    for msg in ['Call me at 9876543210. Send rs.5000 to paytm.', 'idiot!!!!!!!!', 'see www.shop.com', 'hello',
+                'visit www.shop.com\x0bmy number 9876543210', 'visit www.shop.com\xa0now', 'pay\x0bupi idiot']:
+        a, b = native._detailed_moderation(msg), python_only._detailed_moderation(msg)
+        assert (a['status'], a['labels'], a['matches']) == (b['status'], b['labels'], b['matches'])
+        assert native._prompt_message(a) == python_only._prompt_message(b)
+
+def test_native_detector_falls_back_when_unavailable(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'moderation_rs', None)  # import fails
+
+    class NativeAgent(ChatModerationAgent):
+        USE_NATIVE = True
+        _native_built = False
+
+    assert ChatModerationAgent()._native_detector() is None
+    agent = NativeAgent()
+    assert agent._native_detector() is None and NativeAgent._native_built
+    msg = 'Call me at 9876543210. Send rs.5000 to paytm.'
+    assert agent._detailed_moderation(msg) == ChatModerationAgent()._detailed_moderation(msg)
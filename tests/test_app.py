@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('httpx')
+from fastapi.testclient import TestClient
+
+import app
+
+
+def test_batch_routes_reject_oversized_batches():
+    client = TestClient(app.app)
+    product = {'title': 'Chair', 'category': 'Furniture', 'condition': 'Good', 'age_months': 12,
+               'asking_price': 2000, 'use_llm': False}
+    too_many = app.MAX_BATCH_ITEMS + 1
+    assert client.post('/negotiate_batch', json=[product] * too_many).status_code == 422
+    assert client.post('/moderate_batch', json=[{'message': 'hi'}] * too_many).status_code == 422
+    assert client.post('/moderate_batch', json=[{'message': 'hi'}] * 2).status_code == 200
+
+
+def test_moderate_stream_reports_failures_as_an_error_event(monkeypatch):
+    async def broken(message):
+        yield {'event': 'reason', 'status': 'Safe', 'reason': 'Looks fine'}
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(app.moderator, 'moderate_stream', broken)
+    res = TestClient(app.app).post('/moderate_stream', json={'message': 'hello'})
+    assert res.status_code == 200
+    assert res.text == ('event: reason\ndata: {"status":"Safe","reason":"Looks fine"}\n\n'
+                        'event: error\ndata: {"detail":"Moderation failed: boom"}\n\n')
+
+
+def test_reload_skips_malformed_product_rows(tmp_path, monkeypatch):
+    csv = tmp_path / 'products.csv'
+    csv.write_text(
+        'id,title,category,brand,condition,age_months,asking_price,location\n'
+        '1,iPhone 12,Mobile,Apple,Good,24,35000,Mumbai\n'
+        '2,Broken row,Mobile,Apple,Good,two years,9000,Delhi\n'
+        '3,Kurta,Clothing,NA,Like New,3,,Pune\n'
+    )
+    monkeypatch.setattr(app, 'PRODUCTS_PATH', str(csv))
+    monkeypatch.setattr(app, '_PRODUCTS', app._PRODUCTS)
+    monkeypatch.setattr(app, '_PRODUCTS_DF', app._PRODUCTS_DF)
+    client = TestClient(app.app)
+
+    assert client.post('/reload_products').json() == {'reloaded': True, 'count': 2}
+    assert app._PRODUCTS[3].brand == 'NA'
+    assert app._PRODUCTS[3].asking_price is None
+    assert client.get('/load_sample/2').status_code == 404
+    assert client.get('/load_sample/1').status_code == 200
+
+    samples = client.get('/load_samples').json()
+    assert [r['id'] for r in samples['results']] == [1, 3]
+    assert samples['results'][1]['fair_price_range'] is None
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('bs4')
+from cachetools import TTLCache
+
+import utils.comparables as c
+
+OLX_HTML = '<a data-aut-id="itemBox" href="/item/1">iPhone 12 ₹ 32,000</a>'
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """
+    Route the shared client through a MockTransport answering from `responses` by engine,
+    with the caches on a fake clock (`now`, in seconds).
+    """
+    mock = SimpleNamespace(urls=[], responses={}, now=0)
+
+    def handler(request):
+        mock.urls.append(request.url)
+        engine = request.url.params.get('engine') or 'olx'
+        status, body = mock.responses.get(engine, (404, ''))
+        if isinstance(body, dict):
+            return httpx.Response(status, json=body)
+        return httpx.Response(status, text=body)
+
+    monkeypatch.setattr(c, '_CLIENT', httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    clock = lambda: mock.now
+    monkeypatch.setattr(c, '_COMPS_CACHE', TTLCache(maxsize=16, ttl=c.COMPARABLES_TTL, timer=clock))
+    monkeypatch.setattr(c, '_EMPTY_COMPS_CACHE', TTLCache(maxsize=16, ttl=c.COMPARABLES_EMPTY_TTL, timer=clock))
+    monkeypatch.setenv('SERPAPI_API_KEY', 'test')
+    return mock
+
+
+def test_serpapi_results_skip_olx_and_survive_a_failed_search(transport):
+    client = c._CLIENT
+    transport.responses['google'] = (200, {'organic_results': [
+        {'title': 'iPhone 12 for ₹30,000', 'link': 'https://www.olx.in/item/9'}]})
+    transport.responses['google_shopping'] = (500, '')
+
+    comps = asyncio.run(c.get_comparables_async('iPhone 12'))
+    assert comps == [{'site': 'OLX', 'title': 'iPhone 12 for ₹30,000', 'price': 30000,
+                      'url': 'https://www.olx.in/item/9'}]
+    assert {u.host for u in transport.urls} == {'serpapi.com'}
+
+    asyncio.run(c.get_comparables_async('Redmi Note 11'))
+    assert c._http_client() is client
+
+
+def test_olx_is_scraped_when_serpapi_finds_nothing(transport, monkeypatch):
+    monkeypatch.delenv('SERPAPI_API_KEY')
+    transport.responses['olx'] = (200, OLX_HTML)
+
+    comps = asyncio.run(c.get_comparables_async('iPhone 12', location='Mumbai'))
+    assert [(r['site'], r['price'], r['url']) for r in comps] == [('OLX', 32000, 'https://www.olx.in/item/1')]
+    assert [u.host for u in transport.urls] == ['www.olx.in']
+
+
+def test_close_http_client(transport):
+    client = c._CLIENT
+    asyncio.run(c.close_http_client())
+    assert client.is_closed and c._CLIENT is None
+
+
+def _lookups(mock, title='iPhone 12'):
+    before = len(mock.urls)
+    comps = asyncio.run(c.get_comparables_async(title))
+    return comps, len(mock.urls) - before
+
+
+def test_comparables_are_cached_until_the_ttl_expires(transport):
+    transport.responses['google'] = (200, {'organic_results': [{'title': 'iPhone 12 ₹30,000', 'link': 'https://a.in/1'}]})
+    transport.responses['google_shopping'] = (200, {})
+
+    comps, calls = _lookups(transport)
+    assert calls == 2 and len(comps) == 1
+    transport.now = c.COMPARABLES_TTL - 1
+    assert _lookups(transport, ' IPHONE 12 ') == (comps, 0)
+    transport.now = c.COMPARABLES_TTL + 1
+    assert _lookups(transport) == (comps, 2)
+
+
+def test_empty_answers_are_negatively_cached_but_failures_are_not(transport):
+    transport.responses.update({'google': (200, {}), 'google_shopping': (200, {}), 'olx': (200, '<p>no ads</p>')})
+    assert _lookups(transport) == ([], 3)
+    assert _lookups(transport) == ([], 0)
+    transport.now = c.COMPARABLES_EMPTY_TTL + 1
+    assert _lookups(transport) == ([], 3)
+
+    transport.responses['olx'] = (503, '')
+    assert _lookups(transport, 'Redmi Note 11') == ([], 3)
+    assert _lookups(transport, 'Redmi Note 11') == ([], 3)
+
+    transport.responses.update({'google_shopping': (500, ''), 'olx': (200, '<p>no ads</p>')})
+    assert _lookups(transport, 'Sofa') == ([], 3)
+    assert _lookups(transport, 'Sofa') == ([], 3)
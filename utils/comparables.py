@@ -1,8 +1,10 @@
 # utils/comparables.py
-import os, re, requests
+import asyncio, os, re
 from typing import List, Dict, Optional
 from urllib.parse import quote_plus
 from bs4 import BeautifulSoup
+from cachetools import TTLCache
+import httpx
 
 _HEADERS = {
     "User-Agent": (
@@ -12,6 +14,35 @@ _HEADERS = {
     )
 }
 
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+# One shared client keeps TCP/TLS connections to OLX and SerpAPI warm between
+# lookups; created on first use and closed by close_http_client() on shutdown.
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _http_client() -> httpx.AsyncClient:
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(timeout=8, follow_redirects=True)
+    return _CLIENT
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (call on app shutdown)."""
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+# Comparables cache: hits live for an hour, lookups every source answered with nothing
+# are retried sooner, and lookups where a source failed aren't cached at all
+COMPARABLES_TTL = 3600
+COMPARABLES_EMPTY_TTL = 300
+_COMPS_CACHE = TTLCache(maxsize=1024, ttl=COMPARABLES_TTL)
+_EMPTY_COMPS_CACHE = TTLCache(maxsize=1024, ttl=COMPARABLES_EMPTY_TTL)
+
 # More flexible price regex
 PRICE_RE = re.compile(r"(₹\s?[0-9,.KkMm]+|\b[0-9]{4,7}\b)")
 
@@ -37,107 +68,175 @@ def _parse_price(text: str) -> Optional[int]:
         return None
 
 
-def _fetch_olx(query: str, location: Optional[str] = None, max_results: int = 5) -> List[Dict]:
-    """Scrape OLX directly for comparables."""
-    out = []
+def _olx_url(query: str, location: Optional[str] = None) -> str:
     q = quote_plus(query)
-    url = f"https://www.olx.in/items/q-{q}" if not location else f"https://www.olx.in/items/q-{q}-in-{quote_plus(location)}"
+    return f"https://www.olx.in/items/q-{q}" if not location else f"https://www.olx.in/items/q-{q}-in-{quote_plus(location)}"
+
 
+def _parse_olx(html: str, url: str, max_results: int) -> List[Dict]:
+    """Extract priced listings from an OLX search page."""
+    out = []
+    soup = BeautifulSoup(html, "html.parser")
+    seen = set()
+
+    # OLX ad containers (multiple fallbacks)
+    for card in soup.select("a[data-aut-id='itemBox'], li.EIR5N"):
+        if len(out) >= max_results:
+            break
+        title = card.get_text(" ", strip=True)
+        href = card.get("href") or url
+        href_full = href if href.startswith("http") else "https://www.olx.in" + href
+        price_tag = card.find(string=re.compile(r"₹"))
+        price_val = _parse_price(price_tag or "")
+        if price_val:
+            key = (title, price_val)
+            if key not in seen:
+                seen.add(key)
+                out.append({"site": "OLX", "title": title, "price": price_val, "url": href_full})
+
+    return out[:max_results]
+
+
+async def _fetch_olx(client: httpx.AsyncClient, query: str, location: Optional[str] = None,
+                     max_results: int = 5) -> Optional[List[Dict]]:
+    """Scrape OLX directly for comparables; None when the page couldn't be fetched."""
+    url = _olx_url(query, location)
     try:
-        resp = requests.get(url, headers=_HEADERS, timeout=8)
+        resp = await client.get(url, headers=_HEADERS)
         if resp.status_code != 200:
-            return out
-        soup = BeautifulSoup(resp.text, "html.parser")
-        seen = set()
-
-        # OLX ad containers (multiple fallbacks)
-        for card in soup.select("a[data-aut-id='itemBox'], li.EIR5N"):
-            if len(out) >= max_results:
-                break
-            title = card.get_text(" ", strip=True)
-            href = card.get("href") or url
-            href_full = href if href.startswith("http") else "https://www.olx.in" + href
-            price_tag = card.find(string=re.compile(r"₹"))
-            price_val = _parse_price(price_tag or "")
-            if price_val:
-                key = (title, price_val)
-                if key not in seen:
-                    seen.add(key)
-                    out.append({"site": "OLX", "title": title, "price": price_val, "url": href_full})
-
-        return out[:max_results]
+            print("⚠️ OLX fetch error: HTTP", resp.status_code)
+            return None
+        # BeautifulSoup parsing is CPU-bound: keep it off the event loop
+        return await asyncio.to_thread(_parse_olx, resp.text, url, max_results)
     except Exception as e:
         print("⚠️ OLX fetch error:", e)
-        return out
+        return None
 
 
-def _search_with_serpapi(query: str, max_results: int = 8) -> List[Dict]:
-    """Search online using SerpAPI (Google + Shopping)."""
+def _organic_rows(results: Dict, max_results: int) -> List[Dict]:
+    """Normalize SerpAPI organic Google results."""
+    out = []
+    for r in results.get("organic_results", [])[:max_results]:
+        title, link = r.get("title"), r.get("link")
+        snippet = r.get("snippet") or ""
+        price = _parse_price(title or "") or _parse_price(snippet)
+        site = "web"
+        if link:
+            if "olx." in link:
+                site = "OLX"
+            elif "cashify" in link:
+                site = "Cashify"
+            else:
+                try:
+                    site = link.split("/")[2]
+                except Exception:
+                    site = "web"
+        out.append({"site": site, "title": title, "price": price, "url": link})
+    return out
+
+
+def _shopping_rows(results: Dict, max_results: int) -> List[Dict]:
+    """Normalize SerpAPI Google Shopping results."""
+    out = []
+    for r in results.get("shopping_results", [])[:max_results]:
+        price = None
+        if "extracted_price" in r:
+            price = int(float(r["extracted_price"]))
+        else:
+            price = _parse_price(str(r.get("price", "")))
+
+        out.append({
+            "site": r.get("source") or "Google Shopping",
+            "title": r.get("title"),
+            "price": price,
+            "url": r.get("link"),
+        })
+    return out
+
+
+async def _serpapi_get(client: httpx.AsyncClient, params: Dict) -> Dict:
+    resp = await client.get(SERPAPI_URL, params=params)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _search_with_serpapi(client: httpx.AsyncClient, query: str,
+                               max_results: int = 8) -> Optional[List[Dict]]:
+    """
+    Search online using SerpAPI (Google + Shopping); the two searches run concurrently.
+    None when nothing was found and a search failed, i.e. the answer may not really be empty.
+    """
     out = []
     key = os.getenv("SERPAPI_API_KEY")
     if not key:
         return out
-    try:
-        from serpapi import GoogleSearch
-    except ImportError:
-        print("⚠️ Install google-search-results to use SerpAPI")
-        return out
 
-    # Organic search
     params = {"engine": "google", "q": query, "num": max_results, "api_key": key, "hl": "en", "gl": "in"}
-    try:
-        search = GoogleSearch(params)
-        results = search.get_dict()
-        if "organic_results" in results:
-            for r in results["organic_results"][:max_results]:
-                title, link = r.get("title"), r.get("link")
-                snippet = r.get("snippet") or ""
-                price = _parse_price(title or "") or _parse_price(snippet)
-                site = "web"
-                if link:
-                    if "olx." in link:
-                        site = "OLX"
-                    elif "cashify" in link:
-                        site = "Cashify"
-                    else:
-                        try:
-                            site = link.split("/")[2]
-                        except Exception:
-                            site = "web"
-                out.append({"site": site, "title": title, "price": price, "url": link})
-
-        # Shopping results
-        shop_params = {"engine": "google_shopping", "q": query, "api_key": key, "hl": "en", "gl": "in"}
-        shop_search = GoogleSearch(shop_params).get_dict()
-        if "shopping_results" in shop_search:
-            for r in shop_search["shopping_results"][:max_results]:
-                price = None
-                if "extracted_price" in r:
-                    price = int(float(r["extracted_price"]))
-                else:
-                    price = _parse_price(str(r.get("price", "")))
-
-                out.append({
-                    "site": r.get("source") or "Google Shopping",
-                    "title": r.get("title"),
-                    "price": price,
-                    "url": r.get("link"),
-                })
-    except Exception as e:
-        print("⚠️ SerpAPI error:", e)
-    return out
+    shop_params = {"engine": "google_shopping", "q": query, "api_key": key, "hl": "en", "gl": "in"}
+    organic, shopping = await asyncio.gather(
+        _serpapi_get(client, params), _serpapi_get(client, shop_params), return_exceptions=True
+    )
+    # one failed search must not drop the other's results
+    failed = False
+    for results, to_rows in ((organic, _organic_rows), (shopping, _shopping_rows)):
+        if isinstance(results, Exception):
+            print("⚠️ SerpAPI error:", results)
+            failed = True
+            continue
+        try:
+            out.extend(to_rows(results, max_results))
+        except Exception as e:
+            print("⚠️ SerpAPI error:", e)
+            failed = True
+    return None if (failed and not out) else out
+
+
+def _rank_comparables(comps: List[Dict], max_results: int) -> List[Dict]:
+    """Marketplace listings first, then by price (highest first)."""
+    comps_sorted = sorted(
+        comps,
+        key=lambda r: (0 if (r.get("site") and str(r["site"]).lower() in ("olx", "cashify")) else 1,
+                       -int(r.get("price") or 0))
+    )
+    return comps_sorted[:max_results]
+
+
+def _cache_key(title: str, location: Optional[str], max_results: int):
+    return (title.strip().lower(), (location or "").strip().lower(), max_results)
+
+
+def _cache_get(key) -> Optional[List[Dict]]:
+    cached = _COMPS_CACHE.get(key)
+    if cached is None:
+        cached = _EMPTY_COMPS_CACHE.get(key)
+    return None if cached is None else list(cached)
+
+
+def _cache_put(key, comps: List[Dict]) -> None:
+    (_COMPS_CACHE if comps else _EMPTY_COMPS_CACHE)[key] = comps
+
 
+async def get_comparables_async(title: str, location: Optional[str] = None, max_results: int = 6) -> List[Dict]:
+    """
+    Get comparable listings from SerpAPI (preferred) or OLX fallback, served from a TTL
+    cache keyed on the normalized query. The two SerpAPI searches run concurrently; OLX
+    is only scraped when they find nothing.
+    """
+    key = _cache_key(title, location, max_results)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
 
-def get_comparables(title: str, location: Optional[str] = None, max_results: int = 6) -> List[Dict]:
-    """Get comparable listings from SerpAPI (preferred) or OLX fallback."""
     query = f"{title} {location}" if location else title
-    comps = _search_with_serpapi(query, max_results=max_results)
-    if comps:
-        comps_sorted = sorted(
-            comps,
-            key=lambda r: (0 if (r.get("site") and str(r["site"]).lower() in ("olx", "cashify")) else 1,
-                           -int(r.get("price") or 0))
-        )
-        return comps_sorted[:max_results]
-
-    return _fetch_olx(title, location=location, max_results=max_results)
+    client = _http_client()
+    serp = await _search_with_serpapi(client, query, max_results=max_results)
+    if serp:
+        comps = _rank_comparables(serp, max_results)
+    else:
+        olx = await _fetch_olx(client, title, location=location, max_results=max_results)
+        comps = olx or []
+        if not comps and (serp is None or olx is None):
+            return []  # a source failed: don't remember "no comparables" for it
+
+    _cache_put(key, comps)
+    return list(comps)
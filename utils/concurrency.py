@@ -0,0 +1,14 @@
+# utils/concurrency.py
+import asyncio
+from typing import Any, Awaitable, Iterable, List
+
+
+async def gather_bounded(aws: Iterable[Awaitable[Any]], limit: int, return_exceptions: bool = False) -> List[Any]:
+    """asyncio.gather, with at most `limit` of the awaitables running at once."""
+    sem = asyncio.Semaphore(limit)
+
+    async def _run(aw):
+        async with sem:
+            return await aw
+
+    return await asyncio.gather(*(_run(aw) for aw in aws), return_exceptions=return_exceptions)
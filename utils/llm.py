@@ -5,21 +5,52 @@ Gemini LLM client factory.
 Environment variables:
   - GOOGLE_API_KEY : required
   - GEMINI_MODEL   : optional (default: 'gemini-1.5-flash')
+  - LLM_CACHE_SIZE : optional (default: 4096) identical prompts are answered from an in-process LRU
 
 Returns:
-  - Callable[[str], str]  OR None (if no key available)
+  - async Callable[[str], Awaitable[str]]  OR None (if no key available)
 
 Usage:
     from utils.llm import get_llm_client
     llm = get_llm_client()
     if llm:
-        print(llm("Summarize this text."))
+        print(await llm("Summarize this text."))
+        async for chunk in await llm("Summarize this text.", stream=True):
+            print(chunk, end="")
 """
 
+import hashlib
 import os
-from typing import Callable, Optional
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
-def get_llm_client() -> Optional[Callable[[str], str]]:
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "4096"))
+
+# prompt-hash -> response text, least recently used first
+_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+
+def cache_key(prompt: str, **params) -> bytes:
+    """Stable 16-byte key for a prompt plus its generation parameters."""
+    material = repr(sorted(params.items())) + "\0" + prompt
+    return hashlib.blake2b(material.encode("utf-8"), digest_size=16).digest()
+
+
+def cache_get(key: bytes) -> Optional[str]:
+    value = _cache.get(key)
+    if value is not None:
+        _cache.move_to_end(key)
+    return value
+
+
+def cache_put(key: bytes, value: str) -> None:
+    _cache[key] = value
+    _cache.move_to_end(key)
+    while len(_cache) > LLM_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def get_llm_client() -> Optional[Callable[[str], Awaitable[str]]]:
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         return None  # No key → fallback to heuristics
@@ -37,31 +68,68 @@ def get_llm_client() -> Optional[Callable[[str], str]]:
     genai.configure(api_key=api_key)
     model_client = genai.GenerativeModel(model)
 
-    def _call(prompt: str, *, temperature: float = 0.2, max_tokens: int = 512) -> str:
+    async def _call(prompt: str, *, temperature: float = 0.2, max_tokens: int = 512, stream: bool = False):
         """
-        Call Gemini and return plain text output.
+        Call Gemini without blocking the event loop and return plain text output,
+        or an async iterator of text chunks when stream=True.
+        Byte-identical prompts are served from the LRU cache.
         """
+        config = {"temperature": temperature, "max_output_tokens": max_tokens}
+        key = cache_key(prompt, temperature=temperature, max_tokens=max_tokens)
+        if stream:
+            return _stream(prompt, key, config)
+
+        cached = cache_get(key)
+        if cached is not None:
+            return cached
+
         try:
-            response = model_client.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": temperature,
-                    "max_output_tokens": max_tokens,
-                }
-            )
+            response = await model_client.generate_content_async(prompt, generation_config=config)
         except Exception as exc:
             raise RuntimeError(f"Gemini API request failed: {exc}")
 
-        # Extract text safely
+        text = _response_text(response)
+        if text:
+            cache_put(key, text)
+        return text
+
+    async def _stream(prompt: str, key: bytes, config: dict) -> AsyncIterator[str]:
+        cached = cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
         try:
-            if hasattr(response, "text") and response.text:
-                return response.text.strip()
-            if hasattr(response, "candidates") and response.candidates:
-                cand = response.candidates[0]
-                if hasattr(cand, "content") and getattr(cand.content, "parts", None):
-                    return "".join(p.text for p in cand.content.parts if getattr(p, "text", None)).strip()
-            return str(response)
-        except Exception:
-            return str(response)
+            response = await model_client.generate_content_async(prompt, generation_config=config, stream=True)
+        except Exception as exc:
+            raise RuntimeError(f"Gemini API request failed: {exc}")
+
+        parts = []
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except Exception:
+                continue  # chunk without text parts (e.g. safety metadata only)
+            if text:
+                parts.append(text)
+                yield text
+
+        full = "".join(parts).strip()
+        if full:
+            cache_put(key, full)
 
     return _call
+
+
+def _response_text(response) -> str:
+    # Extract text safely
+    try:
+        if hasattr(response, "text") and response.text:
+            return response.text.strip()
+        if hasattr(response, "candidates") and response.candidates:
+            cand = response.candidates[0]
+            if hasattr(cand, "content") and getattr(cand.content, "parts", None):
+                return "".join(p.text for p in cand.content.parts if getattr(p, "text", None)).strip()
+        return str(response)
+    except Exception:
+        return str(response)